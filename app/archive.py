@@ -0,0 +1,194 @@
+"""
+Archivado de citas históricas.
+
+Las citas completadas o canceladas con más de ARCHIVE_AFTER_DAYS días se
+mueven por lotes de `appointments` a `appointments_archive`. Cada lote es una
+transacción corta y entre lotes se hace una pausa, para no retener el bloqueo
+de escritura de SQLite mientras la aplicación atiende peticiones.
+
+Los parámetros se configuran con variables de entorno: ARCHIVE_AFTER_DAYS,
+ARCHIVE_BATCH_SIZE, ARCHIVE_BATCH_PAUSE_SECONDS y ARCHIVE_INTERVAL_SECONDS.
+"""
+
+import heapq
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import DateTime, delete, insert, literal, select, text
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.appointment import Appointment, AppointmentStatus, ArchivedAppointment
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "365"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+ARCHIVE_BATCH_PAUSE_SECONDS = float(os.getenv("ARCHIVE_BATCH_PAUSE_SECONDS", "0.5"))
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", str(6 * 60 * 60)))
+
+ARCHIVABLE_STATUSES = (AppointmentStatus.completed, AppointmentStatus.cancelled)
+
+_COPIED_COLUMNS = (
+    "id",
+    "user_id",
+    "activity_id",
+    "appointment_date",
+    "status",
+    "notes",
+    "created_at",
+    "updated_at",
+)
+
+
+def archive_cutoff(now=None, after_days=None):
+    """Fecha a partir de la cual una cita ya se considera histórica"""
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    if after_days is None:
+        after_days = ARCHIVE_AFTER_DAYS
+    return now - timedelta(days=after_days)
+
+
+def archive_batch(db: Session, cutoff: datetime, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Mueve un lote de citas antiguas al archivo y devuelve cuántas se movieron"""
+    if db.get_bind().dialect.name == "sqlite":
+        # Toma el bloqueo de escritura antes de elegir el lote: si otro proceso
+        # también archiva, espera aquí y luego ve el lote ya movido.
+        db.execute(text("BEGIN IMMEDIATE"))
+    ids = db.execute(
+        select(Appointment.id)
+        .where(
+            Appointment.appointment_date < cutoff,
+            Appointment.status.in_(ARCHIVABLE_STATUSES),
+        )
+        .order_by(Appointment.appointment_date)
+        .limit(batch_size)
+    ).scalars().all()
+    if not ids:
+        db.commit()
+        return 0
+
+    archived_at = datetime.now(timezone.utc)
+    source = select(
+        *[getattr(Appointment, name) for name in _COPIED_COLUMNS],
+        literal(archived_at, DateTime),
+    ).where(Appointment.id.in_(ids))
+    db.execute(
+        insert(ArchivedAppointment).from_select(
+            [*_COPIED_COLUMNS, "archived_at"], source
+        )
+    )
+    db.execute(delete(Appointment).where(Appointment.id.in_(ids)))
+    db.commit()
+    return len(ids)
+
+
+def archive_old_appointments(
+    cutoff=None,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    pause_seconds: float = ARCHIVE_BATCH_PAUSE_SECONDS,
+    stop_event=None,
+    session_factory=SessionLocal,
+) -> int:
+    """Archiva todas las citas anteriores a `cutoff`, un lote por transacción"""
+    cutoff = cutoff or archive_cutoff()
+    total = 0
+    while stop_event is None or not stop_event.is_set():
+        db = session_factory()
+        try:
+            moved = archive_batch(db, cutoff, batch_size)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        total += moved
+        if moved < batch_size:
+            break
+        if stop_event is not None:
+            stop_event.wait(pause_seconds)
+        else:
+            time.sleep(pause_seconds)
+    return total
+
+
+class ArchiveWorker:
+    """Hilo en segundo plano que ejecuta el archivado cada ARCHIVE_INTERVAL_SECONDS.
+
+    Arranca en cada proceso que importa app.main; con varios workers de uvicorn
+    los lotes se serializan con BEGIN IMMEDIATE en `archive_batch`.
+    """
+
+    def __init__(self, interval_seconds: float = ARCHIVE_INTERVAL_SECONDS):
+        self.interval_seconds = interval_seconds
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="appointment-archiver", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                moved = archive_old_appointments(stop_event=self._stop_event)
+                if moved:
+                    print(f"📦 {moved} citas movidas al archivo")
+            except Exception as e:
+                print(f"❌ Error archivando citas: {e}")
+            self._stop_event.wait(self.interval_seconds)
+
+
+def to_naive_utc(value):
+    """Convierte una fecha con zona horaria a UTC sin tzinfo, como se guarda en SQLite"""
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def reaches_archive(date_from=None, date_to=None, include_archived: bool = False) -> bool:
+    """Indica si una consulta debe incluir también las citas archivadas.
+
+    Las fechas deben venir ya normalizadas con `to_naive_utc`.
+    """
+    if include_archived:
+        return True
+    if date_from is not None:
+        return date_from < archive_cutoff()
+    # Un rango sin límite inferior siempre alcanza el archivo
+    return date_to is not None
+
+
+def query_with_archive(db: Session, filters, skip: int = 0, limit=None):
+    """Une citas activas y archivadas ordenadas por fecha, con paginación.
+
+    `filters` recibe el modelo (Appointment o ArchivedAppointment) y devuelve la
+    lista de condiciones a aplicar, ya que ambas tablas tienen las mismas columnas.
+    Con `limit=None` se devuelven todas las citas a partir de `skip`.
+    """
+    window = None if limit is None else skip + limit
+    results = []
+    for model in (Appointment, ArchivedAppointment):
+        query = (
+            db.query(model)
+            .filter(*filters(model))
+            .order_by(model.appointment_date, model.id)
+        )
+        if window is not None:
+            query = query.limit(window)
+        results.append(query.all())
+    merged = heapq.merge(
+        *results, key=lambda a: (a.appointment_date or datetime.min, a.id)
+    )
+    return list(merged)[skip:window]
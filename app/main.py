@@ -4,6 +4,7 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 
+from app.archive import ArchiveWorker
 from app.database import engine, get_db
 from app.models import user, activity, appointment
 from app.routers import users, activities, appointments
@@ -38,6 +39,17 @@ app.include_router(users.router)
 app.include_router(activities.router)
 app.include_router(appointments.router)
 
+# Archivado en segundo plano de citas históricas
+archive_worker = ArchiveWorker()
+
+@app.on_event("startup")
+def start_archive_worker():
+    archive_worker.start()
+
+@app.on_event("shutdown")
+def stop_archive_worker():
+    archive_worker.stop()
+
 # --- RECONSTRUCCIÓN DE MODELOS ---
 AppointmentWithDetails.model_rebuild()
 UserWithAppointments.model_rebuild()
@@ -11,11 +11,13 @@ class AppointmentStatus(str, enum.Enum):
 
 class Appointment(Base):
     __tablename__ = "appointments"
+    # AUTOINCREMENT evita que SQLite reutilice ids de citas ya archivadas
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     activity_id = Column(Integer, ForeignKey("activities.id"))
-    appointment_date = Column(DateTime)
+    appointment_date = Column(DateTime, index=True)
     status = Column(Enum(AppointmentStatus), default=AppointmentStatus.scheduled)
     notes = Column(String, nullable=True)
     # Removed duplicate import of datetime and timezone
@@ -24,4 +26,26 @@ class Appointment(Base):
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     
     user = relationship("User", back_populates="appointments")
-    activity = relationship("Activity", back_populates="appointments")
\ No newline at end of file
+    activity = relationship("Activity", back_populates="appointments")
+
+class ArchivedAppointment(Base):
+    """Citas completadas o canceladas antiguas, movidas fuera de la tabla activa.
+
+    Conserva el mismo id y columnas que `Appointment` para poder servirse con
+    los mismos esquemas de respuesta. Es de solo lectura para la API.
+    """
+    __tablename__ = "appointments_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    activity_id = Column(Integer, ForeignKey("activities.id"), index=True)
+    appointment_date = Column(DateTime, index=True)
+    status = Column(Enum(AppointmentStatus))
+    notes = Column(String, nullable=True)
+
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    archived_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    user = relationship("User", viewonly=True)
+    activity = relationship("Activity", viewonly=True)
@@ -5,8 +5,9 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 
+from app.archive import query_with_archive, reaches_archive, to_naive_utc
 from app.database import get_db
-from app.models.appointment import Appointment, AppointmentStatus
+from app.models.appointment import Appointment, AppointmentStatus, ArchivedAppointment
 from app.schemas.appointment import (
     AppointmentCreate, 
     AppointmentUpdate, 
@@ -17,6 +18,12 @@ from app.schemas.appointment import (
 router = APIRouter(prefix="/appointments", tags=["appointments"])
 templates = Jinja2Templates(directory="app/templates")
 
+def raise_not_found_or_archived(appointment_id: int, db: Session):
+    """Las citas archivadas son de solo lectura: PUT y DELETE responden 409"""
+    if db.query(ArchivedAppointment).filter(ArchivedAppointment.id == appointment_id).first():
+        raise HTTPException(status_code=409, detail="Archived appointments are read-only")
+    raise HTTPException(status_code=404, detail="Appointment not found")
+
 @router.post("/", response_model=AppointmentResponse)
 def create_appointment(
     appointment: AppointmentCreate, 
@@ -39,23 +46,47 @@ def read_appointments(
     user_id: Optional[int] = None,
     activity_id: Optional[int] = None,
     status: Optional[AppointmentStatus] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    include_archived: bool = False,
     db: Session = Depends(get_db)
 ):
-    query = db.query(Appointment)
-    
-    if user_id:
-        query = query.filter(Appointment.user_id == user_id)
-    if activity_id:
-        query = query.filter(Appointment.activity_id == activity_id)
-    if status:
-        query = query.filter(Appointment.status == status)
-    
-    appointments = query.offset(skip).limit(limit).all()
+    date_from, date_to = to_naive_utc(date_from), to_naive_utc(date_to)
+
+    def filters(model):
+        conditions = []
+        if user_id:
+            conditions.append(model.user_id == user_id)
+        if activity_id:
+            conditions.append(model.activity_id == activity_id)
+        if status:
+            conditions.append(model.status == status)
+        if date_from:
+            conditions.append(model.appointment_date >= date_from)
+        if date_to:
+            conditions.append(model.appointment_date <= date_to)
+        return conditions
+
+    # Solo se consulta el archivo cuando se piden rangos históricos
+    if reaches_archive(date_from, date_to, include_archived):
+        return query_with_archive(db, filters, skip, limit)
+
+    # Mismo orden que query_with_archive para que la paginación no cambie
+    appointments = (
+        db.query(Appointment)
+        .filter(*filters(Appointment))
+        .order_by(Appointment.appointment_date, Appointment.id)
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
     return appointments
 
 @router.get("/{appointment_id}", response_model=AppointmentWithDetails)
 def read_appointment(appointment_id: int, db: Session = Depends(get_db)):
     appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
+    if appointment is None:
+        appointment = db.query(ArchivedAppointment).filter(ArchivedAppointment.id == appointment_id).first()
     if appointment is None:
         raise HTTPException(status_code=404, detail="Appointment not found")
     return appointment
@@ -68,7 +99,7 @@ def update_appointment(
 ):
     db_appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
     if db_appointment is None:
-        raise HTTPException(status_code=404, detail="Appointment not found")
+        raise_not_found_or_archived(appointment_id, db)
     
     update_data = appointment_update.dict(exclude_unset=True)
     if update_data:
@@ -85,15 +116,34 @@ def update_appointment(
 def delete_appointment(appointment_id: int, db: Session = Depends(get_db)):
     db_appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
     if db_appointment is None:
-        raise HTTPException(status_code=404, detail="Appointment not found")
+        raise_not_found_or_archived(appointment_id, db)
     
     db.delete(db_appointment)
     db.commit()
     return {"message": "Appointment deleted successfully"}
 
 @router.get("/user/{user_id}/history", response_model=List[AppointmentWithDetails])
-def get_user_appointment_history(user_id: int, db: Session = Depends(get_db)):
-    appointments = db.query(Appointment).filter(Appointment.user_id == user_id).all()
+def get_user_appointment_history(
+    user_id: int,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    include_archived: bool = False,
+    db: Session = Depends(get_db)
+):
+    date_from, date_to = to_naive_utc(date_from), to_naive_utc(date_to)
+
+    def filters(model):
+        conditions = [model.user_id == user_id]
+        if date_from:
+            conditions.append(model.appointment_date >= date_from)
+        if date_to:
+            conditions.append(model.appointment_date <= date_to)
+        return conditions
+
+    if reaches_archive(date_from, date_to, include_archived):
+        return query_with_archive(db, filters)
+
+    appointments = db.query(Appointment).filter(*filters(Appointment)).all()
     return appointments
 
 # Ruta HTML
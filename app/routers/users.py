@@ -53,6 +53,8 @@ def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     users = db.query(User).offset(skip).limit(limit).all()
     return users
 
+# Solo incluye citas activas; el historial archivado está en
+# /appointments/user/{user_id}/history?include_archived=true
 @router.get("/{user_id}", response_model=UserWithAppointments)
 def read_user(user_id: int, db: Session = Depends(get_db)):
     db_user = db.query(User).filter(User.id == user_id).first()
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """
-Script de migración para agregar campos activity_type e is_active
+Script de migración para agregar campos activity_type e is_active, y para
+reconstruir 'appointments' con AUTOINCREMENT (requerido por el archivado de citas)
 Ejecuta este archivo antes de iniciar tu aplicación
 """
 
@@ -10,6 +11,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from sqlalchemy import text, inspect
 from app.database import engine
+from app.models import user, activity  # noqa: F401 - registran las tablas referenciadas
+from app.models.appointment import Appointment
 
 def check_column_exists(table_name, column_name):
     """Verifica si una columna existe en la tabla"""
@@ -17,11 +20,52 @@ def check_column_exists(table_name, column_name):
     columns = [col['name'] for col in inspector.get_columns(table_name)]
     return column_name in columns
 
+def migrate_appointments_autoincrement(conn):
+    """Reconstruye 'appointments' con AUTOINCREMENT para que SQLite no reutilice
+    ids de citas que ya están en 'appointments_archive'"""
+    table_sql = conn.execute(text(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'appointments'"
+    )).scalar()
+    if table_sql is None:
+        return
+    
+    if 'AUTOINCREMENT' not in table_sql.upper():
+        print("➕ Reconstruyendo tabla 'appointments' con AUTOINCREMENT...")
+        # pysqlite no abre transacción antes de DDL: se abre aquí para que un
+        # error a mitad de la reconstrucción la revierta completa
+        if not conn.connection.dbapi_connection.in_transaction:
+            conn.exec_driver_sql("BEGIN")
+        # Los nombres de índice son globales en SQLite: se eliminan antes de renombrar
+        index_names = conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'appointments' AND sql IS NOT NULL"
+        )).scalars().all()
+        for index_name in index_names:
+            conn.execute(text(f'DROP INDEX "{index_name}"'))
+        conn.execute(text("ALTER TABLE appointments RENAME TO appointments_old"))
+        Appointment.__table__.create(conn)
+        columns = ", ".join(col.name for col in Appointment.__table__.columns)
+        conn.execute(text(f"INSERT INTO appointments ({columns}) SELECT {columns} FROM appointments_old"))
+        conn.execute(text("DROP TABLE appointments_old"))
+        print("✅ Tabla 'appointments' reconstruida correctamente")
+    else:
+        print("⚠️  Tabla 'appointments' ya usa AUTOINCREMENT")
+    
+    # El siguiente id debe quedar por encima de todas las citas, activas y archivadas
+    max_id = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM appointments")).scalar()
+    if 'appointments_archive' in inspect(conn).get_table_names():
+        max_archived_id = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM appointments_archive")).scalar()
+        max_id = max(max_id, max_archived_id)
+    seq = conn.execute(text("SELECT seq FROM sqlite_sequence WHERE name = 'appointments'")).scalar()
+    if seq is None:
+        conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES ('appointments', :seq)"), {"seq": max_id})
+    elif seq < max_id:
+        conn.execute(text("UPDATE sqlite_sequence SET seq = :seq WHERE name = 'appointments'"), {"seq": max_id})
+
 def migrate():
     print("🚀 Iniciando migración de base de datos...")
     
-    with engine.begin() as conn:  # Usar transacción
-        try:
+    try:
+        with engine.begin() as conn:  # Usar transacción; un error revierte todos los cambios
             # Verificar si la tabla activities existe
             inspector = inspect(engine)
             if 'activities' not in inspector.get_table_names():
@@ -52,6 +96,13 @@ def migrate():
             print(f"✅ {result1.rowcount} registros actualizados con activity_type")
             print(f"✅ {result2.rowcount} registros actualizados con is_active")
             
+            # AUTOINCREMENT e índice por fecha en appointments, usados por el archivado de citas históricas
+            if 'appointments' in inspector.get_table_names():
+                migrate_appointments_autoincrement(conn)
+                print("➕ Verificando índice 'ix_appointments_appointment_date'...")
+                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_appointments_appointment_date ON appointments (appointment_date)"))
+                print("✅ Índice 'ix_appointments_appointment_date' disponible")
+            
             # Verificar que todo esté correcto
             result = conn.execute(text("SELECT COUNT(*) as count FROM activities"))
             total_activities = result.fetchone()[0]
@@ -60,9 +111,9 @@ def migrate():
             print("✅ Migración completada exitosamente!")
             return True
             
-        except Exception as e:
-            print(f"❌ Error durante la migración: {e}")
-            return False
+    except Exception as e:
+        print(f"❌ Error durante la migración: {e}")
+        return False
 
 def verify_migration():
     """Verifica que la migración se haya ejecutado correctamente"""
@@ -0,0 +1,257 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import archive
+from app.archive import (
+    archive_batch,
+    archive_cutoff,
+    archive_old_appointments,
+    query_with_archive,
+    reaches_archive,
+    to_naive_utc,
+)
+from app.database import Base, get_db
+from app.models.activity import Activity
+from app.models.appointment import Appointment, AppointmentStatus, ArchivedAppointment
+from app.models.user import User
+from app.routers import appointments
+from app.schemas.activity import Activity as ActivitySchema
+from app.schemas.appointment import AppointmentWithDetails
+from app.schemas.user import User as UserSchema
+
+NOW = datetime(2026, 1, 1)
+CUTOFF = NOW - timedelta(days=365)
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = factory()
+    db.add(User(id=1, email="ana@example.com", name="Ana", hashed_password="x"))
+    db.add(Activity(
+        id=1,
+        name="Tour de Tacos",
+        description="Recorrido por taquerías",
+        duration="2 horas",
+        cost=350.0,
+        location="Centro",
+        city="Querétaro",
+    ))
+    db.commit()
+    db.close()
+    yield factory
+    engine.dispose()
+
+
+@pytest.fixture
+def client(session_factory):
+    AppointmentWithDetails.model_rebuild(
+        _types_namespace={"Activity": ActivitySchema, "User": UserSchema}
+    )
+    app = FastAPI()
+    app.include_router(appointments.router)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    return TestClient(app)
+
+
+@pytest.fixture
+def db(session_factory):
+    db = session_factory()
+    yield db
+    db.close()
+
+
+def add_appointment(db, days_ago, status=AppointmentStatus.completed, user_id=1):
+    appointment = Appointment(
+        user_id=user_id,
+        activity_id=1,
+        appointment_date=NOW - timedelta(days=days_ago),
+        status=status,
+    )
+    db.add(appointment)
+    db.commit()
+    return appointment
+
+
+def test_archive_batch_moves_only_old_finished_appointments(db):
+    old_completed = add_appointment(db, 400)
+    old_cancelled = add_appointment(db, 500, AppointmentStatus.cancelled)
+    old_scheduled = add_appointment(db, 600, AppointmentStatus.scheduled)
+    recent = add_appointment(db, 10)
+    ids = {a.id for a in (old_completed, old_cancelled, old_scheduled, recent)}
+
+    assert archive_batch(db, CUTOFF) == 2
+
+    assert {a.id for a in db.query(ArchivedAppointment)} == {old_completed.id, old_cancelled.id}
+    assert {a.id for a in db.query(Appointment)} == ids - {old_completed.id, old_cancelled.id}
+    assert archive_batch(db, CUTOFF) == 0
+
+
+def test_archive_insert_archive_does_not_reuse_ids(db):
+    first = add_appointment(db, 400)
+    first_id = first.id
+    assert archive_batch(db, CUTOFF) == 1
+
+    second = add_appointment(db, 400)
+    assert second.id != first_id
+
+    assert archive_batch(db, CUTOFF) == 1
+    assert db.query(ArchivedAppointment).count() == 2
+
+
+def test_reaches_archive_only_for_historical_ranges():
+    cutoff = archive_cutoff()
+    assert not reaches_archive()
+    assert reaches_archive(include_archived=True)
+    assert reaches_archive(date_from=cutoff - timedelta(days=1))
+    assert not reaches_archive(date_from=cutoff + timedelta(days=1))
+
+
+def test_reaches_archive_with_only_upper_bound():
+    cutoff = archive_cutoff()
+    assert reaches_archive(date_to=cutoff - timedelta(days=1))
+    assert reaches_archive(date_to=cutoff + timedelta(days=1))
+    assert not reaches_archive(
+        date_from=cutoff + timedelta(days=1), date_to=cutoff + timedelta(days=2)
+    )
+
+
+def test_archive_cutoff_uses_configured_age(monkeypatch):
+    assert archive_cutoff(NOW, after_days=30) == NOW - timedelta(days=30)
+    monkeypatch.setattr(archive, "ARCHIVE_AFTER_DAYS", 90)
+    assert archive_cutoff(NOW) == NOW - timedelta(days=90)
+    assert archive_cutoff().tzinfo is None
+
+
+def test_to_naive_utc():
+    aware = datetime(2020, 1, 1, 6, 0, tzinfo=timezone(timedelta(hours=-6)))
+    assert to_naive_utc(aware) == datetime(2020, 1, 1, 12, 0)
+    assert to_naive_utc(datetime(2020, 1, 1)) == datetime(2020, 1, 1)
+    assert to_naive_utc(None) is None
+
+
+def test_archived_appointment_endpoints(db, client):
+    appointment = add_appointment(db, 400)
+    appointment_id = appointment.id
+    archive_batch(db, CUTOFF)
+
+    response = client.get(f"/appointments/{appointment_id}")
+    assert response.status_code == 200
+    assert response.json()["id"] == appointment_id
+
+    response = client.put(f"/appointments/{appointment_id}", json={"notes": "x"})
+    assert response.status_code == 409
+
+    history = client.get("/appointments/user/1/history")
+    assert history.json() == []
+    history = client.get("/appointments/user/1/history?include_archived=true")
+    assert [a["id"] for a in history.json()] == [appointment_id]
+    recent_id = add_appointment(db, 10).id
+    date_to = (archive_cutoff() - timedelta(days=1)).isoformat() + "Z"
+    history = client.get(f"/appointments/?date_to={date_to}")
+    assert [a["id"] for a in history.json()] == [appointment_id]
+    date_to = datetime.now(timezone.utc).isoformat()
+    history = client.get("/appointments/", params={"date_to": date_to})
+    assert [a["id"] for a in history.json()] == [appointment_id, recent_id]
+
+    assert client.delete(f"/appointments/{appointment_id}").status_code == 409
+    assert client.get(f"/appointments/{appointment_id}").status_code == 200
+    assert client.delete("/appointments/999").status_code == 404
+
+
+def test_archive_old_appointments_pauses_between_batches(db, session_factory, monkeypatch):
+    for days_ago in range(400, 405):
+        add_appointment(db, days_ago)
+    pauses = []
+    monkeypatch.setattr(archive.time, "sleep", pauses.append)
+
+    moved = archive_old_appointments(
+        cutoff=CUTOFF, batch_size=2, pause_seconds=0.25, session_factory=session_factory
+    )
+
+    assert moved == 5
+    # Lotes de 2, 2 y 1: solo se pausa después de los lotes completos
+    assert pauses == [0.25, 0.25]
+    assert db.query(Appointment).count() == 0
+
+
+def test_archive_old_appointments_honours_stop_event(db, session_factory):
+    for days_ago in range(400, 405):
+        add_appointment(db, days_ago)
+
+    stopped = threading.Event()
+    stopped.set()
+    assert archive_old_appointments(
+        cutoff=CUTOFF, batch_size=2, stop_event=stopped, session_factory=session_factory
+    ) == 0
+
+    class StopDuringPause:
+        def __init__(self):
+            self.stopped = False
+
+        def is_set(self):
+            return self.stopped
+
+        def wait(self, timeout):
+            self.stopped = True
+
+    assert archive_old_appointments(
+        cutoff=CUTOFF, batch_size=2, stop_event=StopDuringPause(), session_factory=session_factory
+    ) == 2
+    assert db.query(Appointment).count() == 3
+
+
+def test_query_with_archive_merges_and_paginates(db):
+    for days_ago in (700, 500, 300, 100):
+        add_appointment(db, days_ago)
+    archive_batch(db, CUTOFF)
+    for days_ago in (600, 400):
+        add_appointment(db, days_ago, AppointmentStatus.scheduled)
+    assert db.query(ArchivedAppointment).count() == 2
+
+    def filters(model):
+        return [model.user_id == 1]
+
+    def days(appointments):
+        return [(NOW - a.appointment_date).days for a in appointments]
+
+    assert days(query_with_archive(db, filters)) == [700, 600, 500, 400, 300, 100]
+    assert days(query_with_archive(db, filters, skip=0, limit=3)) == [700, 600, 500]
+    assert days(query_with_archive(db, filters, skip=2, limit=3)) == [500, 400, 300]
+    assert days(query_with_archive(db, filters, skip=4, limit=10)) == [300, 100]
+    assert days(query_with_archive(db, filters, skip=3)) == [400, 300, 100]
+
+
+def test_read_appointments_orders_both_paths_the_same(db, client):
+    for days_ago in (300, 100, 500, 200):
+        add_appointment(db, days_ago, AppointmentStatus.scheduled)
+    expected = [a.id for a in db.query(Appointment).order_by(Appointment.appointment_date)]
+
+    active = client.get("/appointments/", params={"skip": 1, "limit": 2}).json()
+    merged = client.get(
+        "/appointments/", params={"skip": 1, "limit": 2, "include_archived": True}
+    ).json()
+
+    assert [a["id"] for a in active] == expected[1:3]
+    assert [a["id"] for a in merged] == expected[1:3]
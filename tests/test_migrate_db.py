@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+import migrate_db
+
+OLD_APPOINTMENTS_SQL = """
+CREATE TABLE appointments (
+    id INTEGER NOT NULL,
+    user_id INTEGER,
+    activity_id INTEGER,
+    appointment_date DATETIME,
+    status VARCHAR(9),
+    notes VARCHAR,
+    created_at DATETIME,
+    updated_at DATETIME,
+    PRIMARY KEY (id)
+)
+"""
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(OLD_APPOINTMENTS_SQL))
+        conn.execute(text("CREATE INDEX ix_appointments_id ON appointments (id)"))
+        conn.execute(text("INSERT INTO appointments (id, status) VALUES (1, 'scheduled'), (2, 'completed')"))
+        conn.execute(text("CREATE TABLE appointments_archive (id INTEGER PRIMARY KEY)"))
+        conn.execute(text("INSERT INTO appointments_archive (id) VALUES (7)"))
+    yield engine
+    engine.dispose()
+
+
+def table_sql(conn):
+    return conn.execute(text(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'appointments'"
+    )).scalar()
+
+
+def test_rebuild_adds_autoincrement_above_archived_ids(engine):
+    with engine.begin() as conn:
+        migrate_db.migrate_appointments_autoincrement(conn)
+
+    with engine.begin() as conn:
+        assert "AUTOINCREMENT" in table_sql(conn)
+        assert conn.execute(text("SELECT id FROM appointments ORDER BY id")).scalars().all() == [1, 2]
+        conn.execute(text("INSERT INTO appointments (status) VALUES ('scheduled')"))
+        assert conn.execute(text("SELECT MAX(id) FROM appointments")).scalar() == 8
+
+
+def test_failed_rebuild_is_rolled_back(engine, monkeypatch):
+    def fail(conn, **kwargs):
+        raise RuntimeError("fallo simulado")
+
+    monkeypatch.setattr(migrate_db.Appointment.__table__, "create", fail)
+    with pytest.raises(RuntimeError):
+        with engine.begin() as conn:
+            migrate_db.migrate_appointments_autoincrement(conn)
+
+    with engine.begin() as conn:
+        assert "AUTOINCREMENT" not in table_sql(conn)
+        tables = conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'")).scalars().all()
+        assert "appointments_old" not in tables
+        assert conn.execute(text("SELECT COUNT(*) FROM appointments")).scalar() == 2